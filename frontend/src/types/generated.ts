@@ -346,6 +346,13 @@ export interface components {
              * @default false
              */
             cancel_requested: boolean;
+            /** Window Stats */
+            window_stats?: {
+                [key: string]: [
+                    number,
+                    number
+                ];
+            };
         };
         /**
          * JobStatus
@@ -13,8 +13,8 @@ ALGORITHMS: tuple[ReconstructionAlgorithm[Any], ...] = (
     SenseAlgorithm(),
 )
 
-_ALGORITHMS_BY_ID: dict[AlgorithmId, ReconstructionAlgorithm[Any]] = {
-    algorithm.id: algorithm for algorithm in ALGORITHMS
+_ALGORITHMS_BY_ID: dict[str, ReconstructionAlgorithm[Any]] = {
+    algorithm.id.value: algorithm for algorithm in ALGORITHMS
 }
 
 
@@ -22,7 +22,7 @@ def list_algorithms() -> tuple[ReconstructionAlgorithm[Any], ...]:
     return ALGORITHMS
 
 
-def get_algorithm(algorithm_id: AlgorithmId) -> ReconstructionAlgorithm[Any]:
+def get_algorithm(algorithm_id: AlgorithmId | str) -> ReconstructionAlgorithm[Any]:
     return _ALGORITHMS_BY_ID[algorithm_id]
 
 
@@ -5,6 +5,8 @@ from typing import Callable, Generic, Self, TypeVar
 
 from abc import ABC, abstractmethod
 
+import numpy as np
+import torch
 from mr2.data import CsmData, IData, KData
 from mr2.data.traj_calculators import (
     KTrajectoryCalculator,
@@ -32,6 +34,11 @@ class DownloadFormat(str, Enum):
     DICOM = "dicom"
 
 
+# Stateless calculators, shared across tasks. Only pulseq needs a per-task instance.
+_ISMRMRD_TRAJECTORY = KTrajectoryIsmrmrd()
+_CARTESIAN_TRAJECTORY = KTrajectoryCartesian()
+
+
 class TrajectoryCalculator(str, Enum):
     ISMRMRD = "ismrmrd"
     CARTESIAN = "cartesian"
@@ -42,9 +49,9 @@ class TrajectoryCalculator(str, Enum):
     ) -> KTrajectoryCalculator | KTrajectoryIsmrmrd:
         match self:
             case TrajectoryCalculator.ISMRMRD:
-                return KTrajectoryIsmrmrd()
+                return _ISMRMRD_TRAJECTORY
             case TrajectoryCalculator.CARTESIAN:
-                return KTrajectoryCartesian()
+                return _CARTESIAN_TRAJECTORY
             case TrajectoryCalculator.PYPULSEQ:
                 if not pulseq_filename:
                     raise ValueError(
@@ -63,13 +70,14 @@ class CsmAlgorithm(str, Enum):
     NONE = "none"
 
     def resolve(self) -> Callable | None:
-        match self:
-            case CsmAlgorithm.WALSH:
-                return CsmData.from_idata_walsh
-            case CsmAlgorithm.INATI:
-                return CsmData.from_idata_inati
-            case CsmAlgorithm.NONE:
-                return None
+        return _CSM_FACTORIES[self]
+
+
+_CSM_FACTORIES: dict[CsmAlgorithm, Callable | None] = {
+    CsmAlgorithm.WALSH: CsmData.from_idata_walsh,
+    CsmAlgorithm.INATI: CsmData.from_idata_inati,
+    CsmAlgorithm.NONE: None,
+}
 
 
 class AlgorithmParamsBase(BaseModel):
@@ -116,6 +124,17 @@ class ReconstructionResult:
     output_path: Path
 
 
+def compute_rss_volume(idata: IData) -> torch.Tensor:
+    """Root-sum-of-squares over coils as a contiguous float32 CPU tensor."""
+    rss = torch.linalg.vector_norm(idata.data.detach(), dim=-4)
+    return rss.to(dtype=torch.float32).cpu().contiguous()
+
+
+def rss_volume_path(output_path: Path) -> Path:
+    """Return the precomputed RSS volume path next to a result file."""
+    return output_path.with_suffix(".rss.npy")
+
+
 ParamsT = TypeVar("ParamsT", bound=AlgorithmParamsBase)
 
 
@@ -130,7 +149,9 @@ class ReconstructionAlgorithm(ABC, Generic[ParamsT]):
         task: ReconstructionTask,
         params: AlgorithmParamsBase,
     ) -> ReconstructionResult:
-        if not isinstance(params, self.params_model):
+        if type(params) is not self.params_model and not isinstance(
+            params, self.params_model
+        ):
             expected_name = self.params_model.__name__
             raise TypeError(
                 f"invalid params type for {self.id}: expected {expected_name}"
@@ -143,8 +164,9 @@ class ReconstructionAlgorithm(ABC, Generic[ParamsT]):
         idata = self.run(task, kdata, params)
         task.output_path.parent.mkdir(parents=True, exist_ok=True)
         idata.save_as_mr2(task.output_path)
+        np.save(rss_volume_path(task.output_path), compute_rss_volume(idata).numpy())
         return ReconstructionResult(
-            result_shape=tuple(idata.shape),
+            result_shape=idata.shape,
             output_path=task.output_path,
         )
 
@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 import signal
 import subprocess
+import sys
 import time
 
 def _terminate(proc: subprocess.Popen[bytes]) -> None:
@@ -18,6 +19,15 @@ def _terminate(proc: subprocess.Popen[bytes]) -> None:
         proc.wait(timeout=3)
 
 
+def _wait_for_child_exit() -> None:
+    # Block until any child exits but leave it unreaped so Popen.poll() still
+    # sees its return code. Fall back to polling where waitid is unavailable.
+    if hasattr(os, "waitid"):
+        os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT)
+    else:
+        time.sleep(0.5)
+
+
 def _spawn(name: str, command: list[str], cwd: Path) -> subprocess.Popen[bytes]:
     process = subprocess.Popen(command, cwd=cwd)
     print(f"[{name}] started pid={process.pid}: {' '.join(command)}")
@@ -59,13 +69,7 @@ def _build_api_command(*, dev_mode: bool) -> list[str]:
 
 
 def _build_worker_command() -> list[str]:
-    return [
-        "uv",
-        "run",
-        "python",
-        "-c",
-        "import mrui.jobs; from huey.consumer import Consumer; from mrui.queue import huey; Consumer(huey).run()",
-    ]
+    return [sys.executable, "-m", "mrui.worker"]
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -119,7 +123,7 @@ def main(argv: list[str] | None = None) -> int:
                     exit_code = code
                 _stop_all()
                 return exit_code
-            time.sleep(0.5)
+            _wait_for_child_exit()
     finally:
         _stop_all()
     return exit_code
@@ -1,33 +1,43 @@
 from __future__ import annotations
 
+from collections import deque
 from pathlib import Path
 import logging
 from traceback import format_exception
 
-from pydantic import TypeAdapter
-
 from mrui.job_status import JobStatus
-from mrui.models import AlgorithmParams
+from mrui.models import params_adapter
 from mrui.queue import huey
 
 from mrui.algorithms import get_algorithm
 from mrui.algorithms.base import AlgorithmId, AlgorithmParamsBase, ReconstructionResult, ReconstructionTask
-from mrui.storage import load_job, update_job
+from mrui.storage import job_metadata_path, load_job, update_job
+
+_MAX_LOG_MESSAGES = 10_000
 
 
 class _ListHandler(logging.Handler):
-    def __init__(self, messages: list[str]) -> None:
+    def __init__(self, max_messages: int) -> None:
         super().__init__()
-        self._messages = messages
+        self._messages: deque[str] = deque(maxlen=max_messages)
+        self._dropped = 0
 
     def emit(self, record: logging.LogRecord) -> None:
+        if len(self._messages) == self._messages.maxlen:
+            self._dropped += 1
         self._messages.append(self.format(record))
 
+    def messages(self) -> list[str]:
+        """Captured log lines, led by a marker if the oldest ones were dropped."""
+        if not self._dropped:
+            return list(self._messages)
+        return [f"... {self._dropped} earlier messages dropped", *self._messages]
+
 
 def run_reconstruction_job(
     *,
     job_id: str | None = None,
-    algorithm_id: AlgorithmId,
+    algorithm_id: AlgorithmId | str,
     input_path: str,
     output_path: str,
     params: AlgorithmParamsBase,
@@ -52,15 +62,16 @@ def run_reconstruction_job(
     Reconstruction result metadata.
     """
 
-    resolved_job_id = job_id or Path(output_path).stem
+    output_file = Path(output_path)
+    results_dir = output_file.parent
+    resolved_job_id = job_id or output_file.stem
     algorithm = get_algorithm(algorithm_id)
     task = ReconstructionTask(
         job_id=resolved_job_id,
         input_path=Path(input_path),
-        output_path=Path(output_path),
+        output_path=output_file,
     )
-    log_messages: list[str] = []
-    handler = _ListHandler(log_messages)
+    handler = _ListHandler(_MAX_LOG_MESSAGES)
     handler.setFormatter(
         logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")
     )
@@ -73,35 +84,37 @@ def run_reconstruction_job(
         result = algorithm(task=task, params=params)
     except Exception as exc:
         update_job(
-            results_dir=Path(output_path).parent,
+            results_dir=results_dir,
             job_id=resolved_job_id,
             status=JobStatus.FAILED,
             error="".join(format_exception(exc)),
-            log_messages=log_messages,
+            log_messages=handler.messages(),
         )
         raise
     finally:
         logger.removeHandler(handler)
         logger.setLevel(previous_level)
 
-    stored_job = load_job(Path(output_path).parent / f"{resolved_job_id}.json")
+    stored_job = load_job(job_metadata_path(results_dir, resolved_job_id))
     if stored_job.cancel_requested:
         update_job(
-            results_dir=Path(output_path).parent,
+            results_dir=results_dir,
             job_id=resolved_job_id,
             status=JobStatus.STOPPED,
             error="Aborted by user",
-            log_messages=log_messages,
+            log_messages=handler.messages(),
+            job=stored_job,
         )
         return result
 
     update_job(
-        results_dir=Path(output_path).parent,
+        results_dir=results_dir,
         job_id=resolved_job_id,
         status=JobStatus.FINISHED,
         result_shape=result.result_shape,
         error=None,
-        log_messages=log_messages,
+        log_messages=handler.messages(),
+        job=stored_job,
     )
     return result
 
@@ -117,13 +130,14 @@ def run_reconstruction_job_task(
     task: object | None = None,
 ) -> None:
     output_parent = Path(output_path).parent
-    job = load_job(output_parent / f"{job_id}.json")
+    job = load_job(job_metadata_path(output_parent, job_id))
     if job.cancel_requested:
         update_job(
             results_dir=output_parent,
             job_id=job_id,
             status=JobStatus.CANCELED,
             error="Aborted by user",
+            job=job,
         )
         return
 
@@ -133,15 +147,16 @@ def run_reconstruction_job_task(
         job_id=job_id,
         status=JobStatus.STARTED,
         queue_task_id=queue_task_id,
+        job=job,
     )
 
-    params_model = TypeAdapter(AlgorithmParams).validate_python(params_payload)
+    params_model = params_adapter.validate_python(params_payload)
     if not isinstance(params_model, AlgorithmParamsBase):
         raise TypeError("invalid params payload")
 
     run_reconstruction_job(
         job_id=job_id,
-        algorithm_id=AlgorithmId(algorithm_id),
+        algorithm_id=algorithm_id,
         input_path=input_path,
         output_path=output_path,
         params=params_model,
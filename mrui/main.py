@@ -1,28 +1,34 @@
+import io
 import json
 import shutil
 import tempfile
 import uuid
+import zipfile
+from collections.abc import Buffer, Iterator
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import quote
 
 import numpy as np
 from fastapi import APIRouter, Depends, FastAPI, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from huey import SqliteHuey
 from mr2.data import IData
 from pydantic import BaseModel
 from starlette.background import BackgroundTask
 from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import Receive, Scope, Send
 import torch
 
-from pydantic import TypeAdapter
-
 from mrui.algorithms import list_algorithms as list_algorithm_specs
 from mrui.algorithms.base import (
     AlgorithmId,
     AlgorithmParamsBase,
     DownloadFormat,
     TrajectoryCalculator,
+    compute_rss_volume,
+    rss_volume_path,
 )
 from mrui.deps import get_huey, get_settings
 from mrui.job_status import JobStatus
@@ -34,14 +40,17 @@ from mrui.models import (
     CreateJobResponse,
     Job,
     JobsListResponse,
+    params_adapter,
 )
 from mrui.settings import Settings
 from mrui.storage import (
     delete_job,
     ensure_io_directories,
+    list_entry_names,
     list_jobs_from_disk,
     load_job,
     save_job,
+    update_job,
 )
 
 
@@ -51,17 +60,41 @@ class HealthResponse(BaseModel):
 
 api_router = APIRouter(prefix="/api")
 
+_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+# Volume axis (of z, y, x) that each slice orientation indexes.
+_SLICE_AXES = {"yx": 0, "zx": 1, "zy": 2}
 
-def _annotate_availability(job: Job, settings: Settings) -> Job:
-    """Annotate a job with input/result file availability flags."""
-    inputs_dir = Path(settings.inputs_dir)
-    results_dir = Path(settings.results_dir)
-    input_path = inputs_dir / f"{job.id}_{job.input_filename}"
-    result_path = results_dir / f"{job.id}.h5"
+
+def _annotate_availability(
+    job: Job,
+    settings: Settings,
+    *,
+    input_names: set[str] | None = None,
+    result_names: set[str] | None = None,
+) -> Job:
+    """Annotate a job with input/result file availability flags.
+
+    Pre-listed directory entry names can be passed to avoid a stat per job.
+    """
+    input_name = f"{job.id}_{job.input_filename}"
+    result_name = f"{job.id}.h5"
+    if input_names is None:
+        input_available = (Path(settings.inputs_dir) / input_name).exists()
+    else:
+        input_available = input_name in input_names
+    if result_names is None:
+        result_available = (Path(settings.results_dir) / result_name).exists()
+    else:
+        result_available = result_name in result_names
+    if (
+        job.input_available == input_available
+        and job.result_available == result_available
+    ):
+        return job
     return job.model_copy(
         update={
-            "input_available": input_path.exists(),
-            "result_available": result_path.exists(),
+            "input_available": input_available,
+            "result_available": result_available,
         }
     )
 
@@ -88,25 +121,55 @@ def _resolve_batch_indices(batch: str | None, batch_dims: tuple[int, ...]) -> li
     return batch_indices
 
 
+def _select_batch_volume(
+    rss_volume: torch.Tensor, batch: str | None
+) -> tuple[list[int], torch.Tensor]:
+    """Resolve the batch query; return its indices and the 3D volume view."""
+    batch_indices = _resolve_batch_indices(batch, tuple(rss_volume.shape[:-3]))
+    return batch_indices, rss_volume[tuple(batch_indices)]
+
+
+def _window_stats_key(batch_indices: list[int]) -> str:
+    """Key for a batch in the stored per-job window statistics."""
+    return ",".join(map(str, batch_indices))
+
+
+@lru_cache(maxsize=4)
+def _load_result_cached(
+    result_file: Path, mtime_ns: int
+) -> tuple[tuple[int, ...], torch.Tensor]:
+    """Load an MR2 result once per file version and return its shape and RSS volume."""
+    idata = IData.from_mr2(result_file)
+    return tuple(idata.shape), compute_rss_volume(idata)
+
+
+def _load_result(result_file: Path) -> tuple[list[int], torch.Tensor]:
+    """Return full shape and RSS volume of a result file, reusing cached decodes."""
+    result_shape, rss_volume = _load_result_cached(
+        result_file, result_file.stat().st_mtime_ns
+    )
+    return list(result_shape), rss_volume
+
+
 def _load_rss_volume(job: Job, settings: Settings) -> tuple[Job, torch.Tensor]:
     """Load MR2 result data, persist full shape metadata, and return RSS volume."""
     result_file = Path(settings.results_dir) / f"{job.id}.h5"
     if not result_file.exists():
         raise HTTPException(status_code=404, detail="result missing")
 
+    rss_file = rss_volume_path(result_file)
+    if job.result_shape is not None and rss_file.exists():
+        # Copy-on-write mapping: endpoints only fault in the planes they read.
+        return job, torch.from_numpy(np.load(rss_file, mmap_mode="c"))
+
     try:
-        idata = IData.from_mr2(result_file)
+        result_shape, rss_volume = _load_result(result_file)
     except Exception as exc:
         raise HTTPException(status_code=500, detail="failed to load result") from exc
 
-    result_shape = list(idata.shape)
     if job.result_shape != result_shape:
         job = job.model_copy(update={"result_shape": result_shape})
         save_job(job, Path(settings.results_dir))
-
-    rss_volume = (
-        idata.rss(keepdim=False).detach().cpu().to(dtype=torch.float32).contiguous()
-    )
     return job, rss_volume
 
 
@@ -131,11 +194,10 @@ def _ensure_result_shape(job: Job, settings: Settings) -> Job:
         return job
 
     try:
-        idata = IData.from_mr2(result_file)
+        result_shape, _ = _load_result(result_file)
     except Exception:
         return job
 
-    result_shape = list(idata.shape)
     if job.result_shape != result_shape:
         job = job.model_copy(update={"result_shape": result_shape})
         save_job(job, Path(settings.results_dir))
@@ -156,27 +218,91 @@ def _cancel_if_revoked(job: Job, results_dir: Path, huey: SqliteHuey) -> Job:
     return job
 
 
+def _read_payload(tensor: torch.Tensor) -> torch.Tensor:
+    """Copy a possibly memory-mapped tensor into a fresh contiguous buffer.
+
+    The RSS volume is usually a mapping of the .rss.npy file. Copying here faults its
+    pages in on the handler thread instead of while the event loop sends the body.
+    """
+    return tensor.clone(memory_format=torch.contiguous_format)
+
+
+def _byte_view(tensor: torch.Tensor) -> memoryview | bytes:
+    """Expose a contiguous CPU tensor as a flat byte buffer without copying it."""
+    array = tensor.numpy()
+    if array.size == 0:
+        return b""
+    return memoryview(array).cast("B")
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Unseekable sink that collects zip output until the response drains it."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Buffer, /) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        return len(chunk)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_zip_archive(source_dir: Path) -> Iterator[bytes]:
+    """Yield a zip archive of a directory tree file by file, without a temp archive."""
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path in sorted(source_dir.rglob("*")):
+            if not path.is_file():
+                continue
+            archive.write(path, arcname=path.relative_to(source_dir).as_posix())
+            if chunk := buffer.drain():
+                yield chunk
+    if chunk := buffer.drain():
+        yield chunk
+
+
+def _attachment_headers(filename: str) -> dict[str, str]:
+    """Content-Disposition header for a download, encoded like FileResponse does."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def _save_upload(upload: UploadFile, path: Path) -> None:
+    """Copy an uploaded file to disk in large chunks and close the upload."""
+    try:
+        with path.open("wb") as output_handle:
+            shutil.copyfileobj(upload.file, output_handle, _UPLOAD_CHUNK_SIZE)
+    finally:
+        upload.file.close()
+
+
 def _cleanup_temp_dir(path: Path) -> None:
     """Remove a temporary export directory and all of its contents."""
     shutil.rmtree(path, ignore_errors=True)
 
 
-@api_router.get("/health", response_model=HealthResponse, operation_id="health")
-def health() -> HealthResponse:
-    """Return API health status."""
-    return HealthResponse(status="ok")
+def _json_response(model: BaseModel) -> Response:
+    """Serialize a response model with pydantic-core, skipping FastAPI's re-encoding."""
+    return Response(content=model.model_dump_json(), media_type="application/json")
 
 
-@api_router.get(
-    "/algorithms",
-    response_model=AlgorithmsResponse,
-    operation_id="list_algorithms",
-)
-def list_algorithms() -> AlgorithmsResponse:
-    """Return available reconstruction algorithms and their default params."""
+@lru_cache(maxsize=1)
+def _algorithms_json() -> bytes:
+    """Serialize the algorithms response once; the registry is fixed per process."""
     algorithms: list[AlgorithmInfo] = []
     for algorithm in list_algorithm_specs():
-        default_params: AlgorithmParams = TypeAdapter(AlgorithmParams).validate_python(
+        default_params: AlgorithmParams = params_adapter.validate_python(
             algorithm.params_model().model_dump()
         )
         algorithms.append(
@@ -187,7 +313,23 @@ def list_algorithms() -> AlgorithmsResponse:
                 default_params=default_params,
             )
         )
-    return AlgorithmsResponse(algorithms=algorithms)
+    return AlgorithmsResponse(algorithms=algorithms).model_dump_json().encode()
+
+
+@api_router.get("/health", response_model=HealthResponse, operation_id="health")
+def health() -> HealthResponse:
+    """Return API health status."""
+    return HealthResponse(status="ok")
+
+
+@api_router.get(
+    "/algorithms",
+    response_model=AlgorithmsResponse,
+    operation_id="list_algorithms",
+)
+def list_algorithms() -> Response:
+    """Return available reconstruction algorithms and their default params."""
+    return Response(content=_algorithms_json(), media_type="application/json")
 
 
 @api_router.post("/jobs", response_model=CreateJobResponse, operation_id="create_job")
@@ -200,7 +342,7 @@ def create_job(
     settings: Settings = Depends(get_settings),
 ) -> CreateJobResponse:
     """Create a reconstruction job, persist metadata, and enqueue background work."""
-    job_id = str(uuid.uuid4())
+    job_id = uuid.uuid4().hex
     inputs_dir = Path(settings.inputs_dir)
     results_dir = Path(settings.results_dir)
     ensure_io_directories(inputs_dir, results_dir)
@@ -227,9 +369,7 @@ def create_job(
         pulseq_filename = Path(pulseq_file.filename or "trajectory.seq").name
         parsed_params["pulseq_filename"] = pulseq_filename
 
-    params_model: AlgorithmParams = TypeAdapter(AlgorithmParams).validate_python(
-        parsed_params
-    )
+    params_model: AlgorithmParams = params_adapter.validate_python(parsed_params)
     if params_model.algorithm != algorithm:
         raise HTTPException(status_code=400, detail="algorithm mismatch")
     if pulseq_file is not None and not isinstance(params_model, AlgorithmParamsBase):
@@ -254,22 +394,20 @@ def create_job(
             detail="pulseq_file can only be set with pypulseq trajectory",
         )
 
-    try:
-        with input_path.open("wb") as output_handle:
-            while chunk := file.file.read(1024 * 1024):
-                output_handle.write(chunk)
-    finally:
-        file.file.close()
+    _save_upload(file, input_path)
 
     if pulseq_file is not None and pulseq_filename is not None:
         pulseq_path = inputs_dir / f"{job_id}_{pulseq_filename}"
-        try:
-            with pulseq_path.open("wb") as output_handle:
-                while chunk := pulseq_file.file.read(1024 * 1024):
-                    output_handle.write(chunk)
-        finally:
-            pulseq_file.file.close()
+        _save_upload(pulseq_file, pulseq_path)
 
+    # Build the task without enqueueing it so its id is stored in the first write.
+    task = run_reconstruction_job_task.s(
+        job_id=job_id,
+        algorithm_id=algorithm.value,
+        input_path=str(input_path),
+        output_path=str(output_path),
+        params_payload=params_adapter.dump_python(params_model, mode="json"),
+    )
     job = Job(
         id=job_id,
         name=job_name,
@@ -288,20 +426,11 @@ def create_job(
         input_available=True,
         result_available=False,
         log_messages=[],
+        queue_task_id=task.id,
     )
+    # Persist before enqueueing so the worker always finds the metadata.
     save_job(job, results_dir)
-
-    task = run_reconstruction_job_task(
-        job_id=job_id,
-        algorithm_id=algorithm.value,
-        input_path=str(input_path),
-        output_path=str(output_path),
-        params_payload=TypeAdapter(AlgorithmParams).dump_python(
-            params_model, mode="json"
-        ),
-    )
-    job = job.model_copy(update={"queue_task_id": task.id})
-    save_job(job, results_dir)
+    run_reconstruction_job_task.huey.enqueue(task)
 
     return CreateJobResponse(job=job)
 
@@ -310,15 +439,21 @@ def create_job(
 def list_jobs(
     settings: Settings = Depends(get_settings),
     huey: SqliteHuey = Depends(get_huey),
-) -> JobsListResponse:
+) -> Response:
     """List all jobs with current availability and queue-revocation status."""
-    jobs = list_jobs_from_disk(Path(settings.results_dir))
     results_dir = Path(settings.results_dir)
+    jobs = list_jobs_from_disk(results_dir)
+    input_names = list_entry_names(Path(settings.inputs_dir))
+    result_names = list_entry_names(results_dir)
     updated_jobs: list[Job] = []
     for job in jobs:
         job = _cancel_if_revoked(job, results_dir, huey)
-        updated_jobs.append(_annotate_availability(job, settings))
-    return JobsListResponse(jobs=updated_jobs)
+        updated_jobs.append(
+            _annotate_availability(
+                job, settings, input_names=input_names, result_names=result_names
+            )
+        )
+    return _json_response(JobsListResponse(jobs=updated_jobs))
 
 
 @api_router.get(
@@ -330,7 +465,7 @@ def get_job_detail(
     job_id: str,
     settings: Settings = Depends(get_settings),
     huey: SqliteHuey = Depends(get_huey),
-) -> Job:
+) -> Response:
     """Return details for a single job."""
     results_dir = Path(settings.results_dir)
     metadata_path = results_dir / f"{job_id}.json"
@@ -342,10 +477,8 @@ def get_job_detail(
     job = _cancel_if_revoked(job, results_dir, huey)
     if job.status == JobStatus.FINISHED:
         job = _ensure_result_shape(job, settings)
-        if job.result_available and job.result_shape is None:
-            job, _ = _load_rss_volume(job, settings)
 
-    return _annotate_availability(job, settings)
+    return _json_response(_annotate_availability(job, settings))
 
 
 @api_router.get(
@@ -361,9 +494,8 @@ def get_job_volume(
     """Return one RSS volume as raw float32 bytes for the requested batch index."""
     job = _load_finished_job(job_id, settings)
     _, rss_volume = _load_rss_volume(job, settings)
-    batch_indices = _resolve_batch_indices(batch, rss_volume.shape[:-3])
-    selection = tuple(batch_indices) + (slice(None), slice(None), slice(None))
-    volume = rss_volume[selection].to(dtype=torch.float32).contiguous()
+    batch_indices, volume = _select_batch_volume(rss_volume, batch)
+    volume = _read_payload(volume)
 
     headers = {
         "X-Volume-Shape": ",".join(str(dim) for dim in volume.shape),
@@ -372,7 +504,7 @@ def get_job_volume(
         "X-Batch-Index": ",".join(str(idx) for idx in batch_indices),
     }
     return Response(
-        content=volume.numpy().tobytes(order="C"),
+        content=_byte_view(volume),
         media_type="application/octet-stream",
         headers=headers,
     )
@@ -393,34 +525,16 @@ def get_job_slice(
     """Return one 2D RSS slice as raw float32 bytes for the requested orientation."""
     job = _load_finished_job(job_id, settings)
 
-    valid_orientations = {"yx", "zx", "zy"}
-    if orientation not in valid_orientations:
+    axis = _SLICE_AXES.get(orientation)
+    if axis is None:
         raise HTTPException(status_code=400, detail="invalid orientation")
 
     _, rss_volume = _load_rss_volume(job, settings)
-    batch_dims = rss_volume.shape[:-3]
-    batch_indices = _resolve_batch_indices(batch, batch_dims)
-    z_size, y_size, x_size = rss_volume.shape[-3:]
-    if orientation == "yx":
-        max_index = z_size
-    elif orientation == "zx":
-        max_index = y_size
-    else:
-        max_index = x_size
-
-    if index < 0 or index >= max_index:
+    batch_indices, volume = _select_batch_volume(rss_volume, batch)
+    if index < 0 or index >= volume.shape[axis]:
         raise HTTPException(status_code=400, detail="slice index out of range")
 
-    prefix = tuple(batch_indices)
-    if orientation == "yx":
-        selection = prefix + (index, slice(None), slice(None))
-    elif orientation == "zx":
-        selection = prefix + (slice(None), index, slice(None))
-    else:
-        selection = prefix + (slice(None), slice(None), index)
-    slice_data = rss_volume[selection]
-
-    payload = slice_data.to(dtype=torch.float32).contiguous()
+    payload = _read_payload(volume.select(axis, index))
 
     headers = {
         "X-Slice-Shape": ",".join(str(dim) for dim in payload.shape),
@@ -432,7 +546,7 @@ def get_job_slice(
     }
 
     return Response(
-        content=payload.numpy().tobytes(order="C"),
+        content=_byte_view(payload),
         media_type="application/octet-stream",
         headers=headers,
     )
@@ -455,15 +569,26 @@ def get_window_stats(
 ) -> WindowStatsResponse:
     """Return p01/p99 windowing statistics for the selected RSS volume."""
     job = _load_finished_job(job_id, settings)
-    _, rss_volume = _load_rss_volume(job, settings)
-    batch_dims = rss_volume.shape[:-3]
-    batch_indices = _resolve_batch_indices(batch, batch_dims)
-    selection = tuple(batch_indices) + (slice(None), slice(None), slice(None))
-    volume = rss_volume[selection].to(dtype=torch.float32)
+    # Stats depend only on the finished result and the batch, so they are stored on the
+    # job. The result shape is (other..., coils, z, y, x); the RSS volume drops coils.
+    if job.result_shape is not None:
+        batch_indices = _resolve_batch_indices(batch, tuple(job.result_shape[:-4]))
+        cached = job.window_stats.get(_window_stats_key(batch_indices))
+        if cached is not None:
+            return WindowStatsResponse(p01=cached[0], p99=cached[1])
+
+    job, rss_volume = _load_rss_volume(job, settings)
+    batch_indices, volume = _select_batch_volume(rss_volume, batch)
 
     # Keep percentiles in NumPy: torch.quantile has known issues for large arrays in this path.
-    volume_np = volume.numpy()
-    p01, p99 = float(np.percentile(volume_np, 1)), float(np.percentile(volume_np, 99))
+    p01, p99 = (float(value) for value in np.percentile(volume.numpy(), [1, 99]))
+    # update_job merges into the freshly read record and skips the write if the job
+    # was deleted in the meantime.
+    update_job(
+        results_dir=Path(settings.results_dir),
+        job_id=job.id,
+        window_stats={_window_stats_key(batch_indices): (p01, p99)},
+    )
     return WindowStatsResponse(p01=p01, p99=p99)
 
 
@@ -509,14 +634,14 @@ def abort_job(
 
 @api_router.get(
     "/jobs/{job_id}/download",
-    response_class=FileResponse,
+    response_class=Response,
     operation_id="download_job_result",
 )
 def download_job_result(
     job_id: str,
     format: DownloadFormat = DownloadFormat.H5,
     settings: Settings = Depends(get_settings),
-) -> FileResponse:
+) -> Response:
     """Download a finished reconstruction result file."""
     job = _load_finished_job(job_id, settings)
 
@@ -563,17 +688,10 @@ def download_job_result(
     if format == DownloadFormat.DICOM:
         dicom_dir = export_dir / "dicom"
         idata.to_dicom_folder(dicom_dir, series_description=job.name)
-        zip_path = Path(
-            shutil.make_archive(
-                str(export_dir / f"{job.name}_dicom"),
-                "zip",
-                root_dir=dicom_dir,
-            )
-        )
-        return FileResponse(
-            zip_path,
-            filename=f"{job.name}.dicom.zip",
+        return StreamingResponse(
+            _iter_zip_archive(dicom_dir),
             media_type="application/zip",
+            headers=_attachment_headers(f"{job.name}.dicom.zip"),
             background=BackgroundTask(_cleanup_temp_dir, export_dir),
         )
 
@@ -641,9 +759,28 @@ def delete_job_endpoint(
         inputs_dir=Path(settings.inputs_dir),
         job_id=job_id,
     )
+    _load_result_cached.cache_clear()
     return Response(status_code=204)
 
 
+class _SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip JSON responses but pass binary volume and file payloads through.
+
+    Float32 volumes, MR2/H5 results and DICOM zips barely compress, so gzipping them
+    only burns CPU and forces the whole body through the compressor.
+    """
+
+    _UNCOMPRESSED_PATH_SUFFIXES = ("/volume", "/slice", "/download", "/input")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].endswith(
+            self._UNCOMPRESSED_PATH_SUFFIXES
+        ):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 app = FastAPI(title="mrui")
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(_SelectiveGZipMiddleware, minimum_size=1000)
 app.include_router(api_router)
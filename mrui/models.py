@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Annotated, Protocol, TYPE_CHECKING, TypeAlias, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 from mrui.algorithms.base import AlgorithmId, DownloadFormat, AlgorithmParamsBase
 from mrui.algorithms import list_algorithms
@@ -26,6 +26,10 @@ else:
     ]
 
 
+# Shared validator for the params union, built once at import.
+params_adapter: TypeAdapter[AlgorithmParams] = TypeAdapter(AlgorithmParams)
+
+
 class AlgorithmInfo(BaseModel):
     """Algorithm metadata for the UI."""
 
@@ -59,6 +63,7 @@ class Job(BaseModel):
     error: str | None = None
     queue_task_id: str | None = None
     cancel_requested: bool = False
+    window_stats: dict[str, tuple[float, float]] = Field(default_factory=dict)
 
 
 class JobsListResponse(BaseModel):
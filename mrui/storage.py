@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-import json
+import os
+import time
+import uuid
 from pathlib import Path
 
+from mrui.algorithms.base import rss_volume_path
 from mrui.job_status import JobStatus
 from mrui.models import Job
 
@@ -13,6 +16,16 @@ def job_metadata_path(results_dir: Path, job_id: str) -> Path:
     return results_dir / f"{job_id}.json"
 
 
+def list_entry_names(directory: Path) -> set[str]:
+    """Return the names of all entries in a directory, empty if it does not exist."""
+
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries}
+    except FileNotFoundError:
+        return set()
+
+
 def ensure_io_directories(inputs_dir: Path, results_dir: Path) -> None:
     """Ensure inputs and results directories exist."""
 
@@ -23,6 +36,10 @@ def ensure_io_directories(inputs_dir: Path, results_dir: Path) -> None:
 def save_job(job: Job, results_dir: Path) -> None:
     """Persist job metadata to a JSON file.
 
+    The record is written to a temporary file and renamed into place, so readers
+    never see a partially written file. The write is skipped when the file
+    already holds the same serialized record.
+
     Parameters
     ----------
     job
@@ -32,11 +49,27 @@ def save_job(job: Job, results_dir: Path) -> None:
     """
 
     results_dir.mkdir(parents=True, exist_ok=True)
-    payload = job.model_dump(mode="json")
-    job_metadata_path(results_dir, job.id).write_text(
-        json.dumps(payload, ensure_ascii=True, indent=2),
-        encoding="utf-8",
-    )
+    metadata_path = job_metadata_path(results_dir, job.id)
+    payload = job.model_dump_json().encode()
+    try:
+        if (
+            metadata_path.stat().st_size == len(payload)
+            and metadata_path.read_bytes() == payload
+        ):
+            return
+    except FileNotFoundError:
+        pass
+    # Unique temp name: the API and the worker may save the same job concurrently.
+    # Mode 0o666 lets the kernel apply the umask, as a plain open() would.
+    tmp_path = results_dir / f".{job.id}.{uuid.uuid4().hex}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(payload)
+        os.replace(tmp_path, metadata_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def load_job(metadata_path: Path) -> Job:
@@ -52,21 +85,56 @@ def load_job(metadata_path: Path) -> Job:
     Parsed job record.
     """
 
-    payload = json.loads(metadata_path.read_text(encoding="utf-8"))
-    return Job.model_validate(payload)
+    return Job.model_validate_json(metadata_path.read_bytes())
+
+
+# Parsed records keyed by metadata path, with the (mtime_ns, size) they were read at.
+_JOB_CACHE: dict[Path, tuple[tuple[int, int], Job]] = {}
+# A file modified this close to the time it was read may be rewritten again without
+# a visible mtime change (coarse timestamps, e.g. NFS). Like git's racy index entries,
+# such records are not cached and get re-parsed on the next call.
+_RACY_WINDOW_NS = 2_000_000_000
 
 
 def list_jobs_from_disk(results_dir: Path) -> list[Job]:
-    """Load all job metadata records from the results directory."""
+    """Load all job metadata records from the results directory.
+
+    Records are only re-parsed when their file changed since the previous call, or
+    when it was modified too recently to trust its timestamp.
+    """
 
     if not results_dir.exists():
         return []
+    now_ns = time.time_ns()
     jobs: list[Job] = []
-    for metadata_path in results_dir.glob("*.json"):
-        try:
-            jobs.append(load_job(metadata_path))
-        except (ValueError, json.JSONDecodeError, KeyError):
-            continue
+    seen: set[Path] = set()
+    with os.scandir(results_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            metadata_path = Path(entry.path)
+            seen.add(metadata_path)
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            version = (stat.st_mtime_ns, stat.st_size)
+            cached = _JOB_CACHE.get(metadata_path)
+            if cached is not None and cached[0] == version:
+                jobs.append(cached[1])
+                continue
+            try:
+                job = load_job(metadata_path)
+            except (ValueError, FileNotFoundError):
+                continue
+            if now_ns - stat.st_mtime_ns >= _RACY_WINDOW_NS:
+                _JOB_CACHE[metadata_path] = (version, job)
+            else:
+                _JOB_CACHE.pop(metadata_path, None)
+            jobs.append(job)
+    for cached_path in list(_JOB_CACHE):
+        if cached_path.parent == results_dir and cached_path not in seen:
+            _JOB_CACHE.pop(cached_path, None)
     return jobs
 
 
@@ -80,6 +148,8 @@ def update_job(
     log_messages: list[str] | None = None,
     queue_task_id: str | None = None,
     cancel_requested: bool | None = None,
+    window_stats: dict[str, tuple[float, float]] | None = None,
+    job: Job | None = None,
 ) -> None:
     """Update stored job metadata fields.
 
@@ -93,22 +163,36 @@ def update_job(
         Optional status update.
     result_shape
         Optional result shape update.
+    window_stats
+        Optional per-batch window statistics to merge into the stored ones.
+    job
+        Freshly loaded job record to update instead of re-reading it from disk.
     """
 
-    metadata_path = job_metadata_path(results_dir, job_id)
-    if not metadata_path.exists():
-        return
-    job = load_job(metadata_path)
+    if job is None:
+        metadata_path = job_metadata_path(results_dir, job_id)
+        if not metadata_path.exists():
+            return
+        job = load_job(metadata_path)
     updated = job.model_copy(
         update={
             "status": status or job.status,
-            "result_shape": list(result_shape) if result_shape is not None else job.result_shape,
+            "result_shape": list(result_shape)
+            if result_shape is not None
+            else job.result_shape,
             "error": error if error is not None else job.error,
-            "log_messages": log_messages if log_messages is not None else job.log_messages,
-            "queue_task_id": queue_task_id if queue_task_id is not None else job.queue_task_id,
+            "log_messages": log_messages
+            if log_messages is not None
+            else job.log_messages,
+            "queue_task_id": queue_task_id
+            if queue_task_id is not None
+            else job.queue_task_id,
             "cancel_requested": cancel_requested
             if cancel_requested is not None
             else job.cancel_requested,
+            "window_stats": {**job.window_stats, **window_stats}
+            if window_stats is not None
+            else job.window_stats,
         }
     )
     save_job(updated, results_dir)
@@ -126,5 +210,6 @@ def delete_job(
     result_path = results_dir / f"{job_id}.h5"
     metadata_path.unlink(missing_ok=True)
     result_path.unlink(missing_ok=True)
+    rss_volume_path(result_path).unlink(missing_ok=True)
     for input_path in inputs_dir.glob(f"{job_id}_*"):
         input_path.unlink(missing_ok=True)
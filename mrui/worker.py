@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from huey.consumer import Consumer
+
+import mrui.jobs  # noqa: F401  # registers the reconstruction task with huey
+from mrui.queue import huey
+
+
+def main() -> None:
+    Consumer(huey).run()
+
+
+if __name__ == "__main__":
+    main()